@@ -1,52 +1,56 @@
 #!/usr/bin/env python3
 import re
 import os
+from concurrent.futures import ProcessPoolExecutor
+
+from fix_common import INDEX_NAMES, apply_fixes, index_fix, load_cache, read_source, save_cache, write_source
+
+# sql.Should().Contain(...) with a stray closing paren
+_RE_SQL_CONTAIN_PARENS = re.compile(r'sql\.Should\(\)\.Contain\(([^)\n]+)\)\)')
+_RE_SQL_CONTAIN_LITERAL = re.compile(r'sql\.Should\(\)\.Contain\("([^"\n]+)"\)\);')
+
+# Content without any of these substrings cannot match a fix pattern
+TRIGGERS = ('results[', 'entities[', 'items[', 'list[', 'sql.Should().Contain(')
+
+FIXES = (
+    # Fix pattern: ].Should().[method]() -> ].method.Should().Be[Value]()
+    # e.g., results[0].Should().NotBeNull(); -> results[0].Should().NotBeNull();
+
+    # Fix pattern with invalid prefix: results[0., results[1., etc.
+    # This script has never touched entries[N.
+    index_fix(tuple(name for name in INDEX_NAMES if name != 'entries')),
+
+    # Fix pattern: sql.Contains("text").Should().BeTrue() patterns that are within parens
+    # This handles patterns in BaseEntityMapperAdvancedTests.cs
+    ((), _RE_SQL_CONTAIN_PARENS, r'sql.Should().Contain(\1)'),
+
+    # Fix incomplete parentheses patterns
+    ((), _RE_SQL_CONTAIN_LITERAL, r'sql.Should().Contain("\1");'),
+)
 
 def fix_assertion_issues(content):
-    """Fix all remaining FluentAssertion syntax issues"""
-    lines = content.split('\n')
-    fixed_lines = []
+    """Fix all remaining FluentAssertion syntax issues, returning (content, number of substitutions)"""
+    if not any(tok in content for tok in TRIGGERS):
+        return content, 0
     
-    for line in lines:
-        original_line = line
-        
-        # Fix pattern: ].Should().[method]() -> ].method.Should().Be[Value]()
-        # e.g., results[0].Should().NotBeNull(); -> results[0].Should().NotBeNull();
-        
-        # Fix pattern with invalid prefix: results[0., results[1., etc.
-        line = re.sub(r'results\[(\d+)\.', r'results[\1].', line)
-        line = re.sub(r'entities\[(\d+)\.', r'entities[\1].', line)
-        line = re.sub(r'items\[(\d+)\.', r'items[\1].', line)
-        line = re.sub(r'list\[(\d+)\.', r'list[\1].', line)
-        
-        # Fix pattern: sql.Contains("text").Should().BeTrue() patterns that are within parens
-        # This handles patterns in BaseEntityMapperAdvancedTests.cs
-        line = re.sub(r'sql\.Should\(\)\.Contain\(([^)]+)\)\)', r'sql.Should().Contain(\1)', line)
-        
-        # Fix incomplete parentheses patterns
-        line = re.sub(r'sql\.Should\(\)\.Contain\("([^"]+)"\)\);', r'sql.Should().Contain("\1");', line)
-        
-        fixed_lines.append(line)
-    
-    return '\n'.join(fixed_lines)
+    return apply_fixes(FIXES, content)
 
-def process_file(filepath):
-    """Process a single file"""
+def process_file(filepath, cached=None):
+    """Process a single file, skipping it if unchanged since the last pass"""
     if not os.path.exists(filepath):
-        return False
+        return False, None
         
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+    content, state = read_source(filepath, TRIGGERS, cached)
+    if content is None:
+        return False, state
     
-    original_content = content
-    content = fix_assertion_issues(content)
+    content, changes = fix_assertion_issues(content)
     
-    if content != original_content:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+    if changes:
+        state = write_source(filepath, content)
         print(f"Fixed {filepath}")
-        return True
-    return False
+        return True, state
+    return False, state
 
 # Fix specific files with known issues
 files_to_fix = [
@@ -60,5 +64,11 @@ files_to_fix = [
     '/mnt/e/work/github/crp/persistence-lib/UnitTest/Providers/SQLitePersistenceProviderAdvancedTests.cs'
 ]
 
-for filepath in files_to_fix:
-    process_file(filepath)
\ No newline at end of file
+def main():
+    cache = load_cache((__file__,))
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(process_file, files_to_fix, [cache.get(f) for f in files_to_fix]))
+    save_cache((__file__,), {f: state for f, (_, state) in zip(files_to_fix, results) if state})
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+TEST_DIR = '/mnt/e/work/github/crp/persistence-lib/UnitTest'
+
+@lru_cache(maxsize=None)
+def all_cs_files():
+    """Return every .cs file under TEST_DIR, walking the tree only on the first call
+
+    Call it from main() and pass the result to the executor, so importing this
+    module (as every pool worker does under spawn) never walks the tree.
+    """
+    return tuple(
+        os.path.join(root, file)
+        for root, dirs, files in os.walk(TEST_DIR)
+        for file in files
+        if file.endswith('.cs'))
+
+# Collections whose invalid index prefixes are fixed: results[0., entities[1., etc.
+INDEX_NAMES = ('results', 'entities', 'items', 'list', 'entries')
+
+def index_fix(names):
+    """Return the (gate, pattern, replacement) fix for invalid index prefixes on names: results[0. -> results[0].
+
+    The gate holds the literals the pattern needs; nearly every test file has a '[' from attributes and indexers.
+    """
+    return (tuple(f'{name}[' for name in names),
+            re.compile(r'(' + '|'.join(names) + r')\[(\d+)\.'),
+            r'\1[\2].')
+
+# {script: {'fingerprint': ..., 'files': {filepath: [mtime_ns, hash]}}}
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'fix_assertions.json')
+
+def apply_fixes(fixes, content):
+    """Run each (gate, pattern, replacement) of fixes over content in order, returning (content, number of substitutions)
+
+    A pattern only runs when one of its gate substrings is in the content; an empty gate always runs.
+    """
+    changes = 0
+    for gate, pattern, repl in fixes:
+        if gate and not any(tok in content for tok in gate):
+            continue
+        content, count = pattern.subn(repl, content)
+        changes += count
+    return content, changes
+
+def file_state(filepath, data):
+    """Return the (mtime, hash) state recorded in the cache for a file's bytes"""
+    return [os.stat(filepath).st_mtime_ns, hashlib.blake2b(data, digest_size=16).hexdigest()]
+
+def decode_source(data):
+    """Decode file bytes with universal newlines, the same way Path.read_text does"""
+    return data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+def read_source(filepath, triggers, cached=None):
+    """Return (content, state) for a file, with content None when the file is unchanged
+    since the cached state or contains none of the trigger substrings"""
+    with open(filepath, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            # mmap cannot map an empty file, and an empty file has nothing to fix
+            return None, file_state(filepath, b'')
+        # Map the file so the trigger pre-check runs on the bytes, decoding only on a hit
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            state = file_state(filepath, mm)
+            if state == cached or not any(mm.find(tok.encode('utf-8')) != -1 for tok in triggers):
+                return None, state
+            return decode_source(mm[:]), state
+
+def write_source(filepath, content):
+    """Write content as UTF-8 and return the file's new cache state"""
+    data = content.encode('utf-8')
+    # Whole-file write straight to the fd, skipping the buffered/text layers
+    fd = os.open(filepath, os.O_WRONLY | os.O_TRUNC | os.O_CREAT, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        mtime_ns = os.fstat(fd).st_mtime_ns
+    finally:
+        os.close(fd)
+    return [mtime_ns, hashlib.blake2b(data, digest_size=16).hexdigest()]
+
+def _read_cache():
+    try:
+        return json.loads(Path(CACHE_FILE).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+def _fingerprint(sources):
+    # Any change to the fixer code (or this module) invalidates its cached pass
+    h = hashlib.blake2b(digest_size=16)
+    for source in sources + (__file__,):
+        h.update(Path(source).read_bytes())
+    return h.hexdigest()
+
+def load_cache(sources):
+    """Return the file states from the last pass of the script sources[0]"""
+    entry = _read_cache().get(Path(sources[0]).stem)
+    if not entry or entry.get('fingerprint') != _fingerprint(sources):
+        return {}
+    return entry['files']
+
+def save_cache(sources, files):
+    """Record the file states after a successful pass of the script sources[0]"""
+    cache = _read_cache()
+    cache[Path(sources[0]).stem] = {'fingerprint': _fingerprint(sources), 'files': files}
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    Path(CACHE_FILE + '.tmp').write_text(json.dumps(cache), encoding='utf-8')
+    os.replace(CACHE_FILE + '.tmp', CACHE_FILE)
\ No newline at end of file
@@ -1,51 +1,67 @@
 #!/usr/bin/env python3
 import re
-import os
+from concurrent.futures import ProcessPoolExecutor
+
+from fix_common import all_cs_files, apply_fixes, load_cache, read_source, save_cache, write_source
+
+# Numeric comparison methods that should be DateTime comparison methods
+_RE_LESS_THAN_OR_EQUAL = re.compile(r'\.Should\(\)\.BeLessThanOrEqualTo\(', re.ASCII | re.MULTILINE)
+_RE_LESS_OR_EQUAL = re.compile(r'\.Should\(\)\.BeLessOrEqualTo\(', re.ASCII | re.MULTILINE)
+_RE_GREATER_THAN_OR_EQUAL = re.compile(r'\.Should\(\)\.BeGreaterThanOrEqualTo\(', re.ASCII | re.MULTILINE)
+_RE_GREATER_OR_EQUAL = re.compile(r'\.Should\(\)\.BeGreaterOrEqualTo\(', re.ASCII | re.MULTILINE)
+_RE_LESS_THAN = re.compile(r'\.Should\(\)\.BeLessThan\(', re.ASCII | re.MULTILINE)
+_RE_GREATER_THAN = re.compile(r'\.Should\(\)\.BeGreaterThan\(', re.ASCII | re.MULTILINE)
+
+# Whole lines mentioning Time/Date of (left > right).Should().BeTrue() and (left < right).Should().BeTrue()
+# The BeTrue lookahead rejects other lines before the lazy operands can backtrack
+_RE_GREATER_BE_TRUE = re.compile(r'^(?=.*(?:Time|Date))(?=.*\)\.Should\(\)\.BeTrue\(\))([^\S\n]*)\((.+?)[^\S\n]*>[^\S\n]*(.+?)\)\.Should\(\)\.BeTrue\(\).*', re.ASCII | re.MULTILINE)
+_RE_LESS_BE_TRUE = re.compile(r'^(?=.*(?:Time|Date))(?=.*\)\.Should\(\)\.BeTrue\(\))([^\S\n]*)\((.+?)[^\S\n]*<[^\S\n]*(.+?)\)\.Should\(\)\.BeTrue\(\).*', re.ASCII | re.MULTILINE)
+
+# Content without any of these substrings cannot match a fix pattern
+TRIGGERS = ('.Should().BeLess', '.Should().BeGreater', ').Should().BeTrue()')
+
+FIXES = (
+    # Fix DateTime comparisons
+    (('.Should().BeLessThanOrEqualTo(',), _RE_LESS_THAN_OR_EQUAL, r'.Should().BeOnOrBefore('),
+    (('.Should().BeLessOrEqualTo(',), _RE_LESS_OR_EQUAL, r'.Should().BeOnOrBefore('),
+    (('.Should().BeGreaterThanOrEqualTo(',), _RE_GREATER_THAN_OR_EQUAL, r'.Should().BeOnOrAfter('),
+    (('.Should().BeGreaterOrEqualTo(',), _RE_GREATER_OR_EQUAL, r'.Should().BeOnOrAfter('),
+    (('.Should().BeLessThan(',), _RE_LESS_THAN, r'.Should().BeBefore('),
+    (('.Should().BeGreaterThan(',), _RE_GREATER_THAN, r'.Should().BeAfter('),
+
+    # Fix cases where we have comparison operators with DateTime
+    # Pattern: (dateTime1 > dateTime2).Should().BeTrue() -> dateTime1.Should().BeAfter(dateTime2)
+    ((').Should().BeTrue()',), _RE_GREATER_BE_TRUE, r'\1\2.Should().BeAfter(\3)'),
+    ((').Should().BeTrue()',), _RE_LESS_BE_TRUE, r'\1\2.Should().BeBefore(\3)'),
+)
 
 def fix_datetime_assertions(content):
-    """Fix DateTime/DateTimeOffset assertions to use correct FluentAssertions methods"""
-    lines = content.split('\n')
-    fixed_lines = []
+    """Fix DateTime/DateTimeOffset assertions to use correct FluentAssertions methods, returning (content, number of substitutions)"""
+    if not any(tok in content for tok in TRIGGERS):
+        return content, 0
+    
+    return apply_fixes(FIXES, content)
+
+def process_file(filepath, cached=None):
+    """Process a single file, skipping it if unchanged since the last pass"""
+    content, state = read_source(filepath, TRIGGERS, cached)
+    if content is None:
+        return False, state
     
-    for line in lines:
-        # Fix DateTime comparisons
-        line = re.sub(r'\.Should\(\)\.BeLessThanOrEqualTo\(', r'.Should().BeOnOrBefore(', line)
-        line = re.sub(r'\.Should\(\)\.BeLessOrEqualTo\(', r'.Should().BeOnOrBefore(', line)
-        line = re.sub(r'\.Should\(\)\.BeGreaterThanOrEqualTo\(', r'.Should().BeOnOrAfter(', line)
-        line = re.sub(r'\.Should\(\)\.BeGreaterOrEqualTo\(', r'.Should().BeOnOrAfter(', line)
-        line = re.sub(r'\.Should\(\)\.BeLessThan\(', r'.Should().BeBefore(', line)
-        line = re.sub(r'\.Should\(\)\.BeGreaterThan\(', r'.Should().BeAfter(', line)
-        
-        # Fix cases where we have comparison operators with DateTime
-        # Pattern: (dateTime1 > dateTime2).Should().BeTrue() -> dateTime1.Should().BeAfter(dateTime2)
-        match = re.match(r'^(\s*)\((.+?)\s*>\s*(.+?)\)\.Should\(\)\.BeTrue\(\)', line)
-        if match and ('Time' in line or 'Date' in line):
-            indent, left, right = match.groups()
-            line = f"{indent}{left}.Should().BeAfter({right})"
-            
-        match = re.match(r'^(\s*)\((.+?)\s*<\s*(.+?)\)\.Should\(\)\.BeTrue\(\)', line)
-        if match and ('Time' in line or 'Date' in line):
-            indent, left, right = match.groups()
-            line = f"{indent}{left}.Should().BeBefore({right})"
-            
-        fixed_lines.append(line)
+    content, changes = fix_datetime_assertions(content)
     
-    return '\n'.join(fixed_lines)
-
-# Process all test files
-test_dir = '/mnt/e/work/github/crp/persistence-lib/UnitTest'
-
-for root, dirs, files in os.walk(test_dir):
-    for file in files:
-        if file.endswith('.cs'):
-            filepath = os.path.join(root, file)
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            original_content = content
-            content = fix_datetime_assertions(content)
-            
-            if content != original_content:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                print(f"Fixed {filepath}")
\ No newline at end of file
+    if changes:
+        state = write_source(filepath, content)
+        print(f"Fixed {filepath}")
+        return True, state
+    return False, state
+
+def main():
+    files = all_cs_files()
+    cache = load_cache((__file__,))
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(process_file, files, [cache.get(f) for f in files]))
+    save_cache((__file__,), {f: state for f, (_, state) in zip(files, results)})
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
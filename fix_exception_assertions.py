@@ -1,108 +1,140 @@
 #!/usr/bin/env python3
 import re
-import os
+from concurrent.futures import ProcessPoolExecutor
+
+from fix_common import all_cs_files, apply_fixes, load_cache, read_source, save_cache, write_source
+
+# A lambda block ends at the first line containing "});" or "}).Should().Throw"
+_LAMBDA_END = r'(?:\}\);|\}\)\.Should\(\)\.Throw)'
+
+# Content without any of these substrings cannot match a fix pattern
+TRIGGERS = ('.Should().Throw',)
+
+def _lambda_throw(indent, code, exception_type, rest):
+    # Check if the code part already has .Should() in it (malformed)
+    if '.Should()' in code:
+        # Extract the actual code part before .Should()
+        code_parts = code.split('.Should()')
+        if len(code_parts) > 1:
+            code = code_parts[0]
+    return (f"{indent}// Act & Assert\n"
+            f"{indent}Action act = () => {code};\n"
+            f"{indent}act.Should().Throw<{exception_type}>(){rest}")
+
+def _action_throw(indent, code, exception_type):
+    return (f"{indent}// Act & Assert\n"
+            f"{indent}Action act = () => {code};\n"
+            f"{indent}act.Should().Throw<{exception_type}>();")
+
+def _multiline_lambda_throw(indent, body, exception_type):
+    return (f"{indent}// Act & Assert\n"
+            f"{indent}Action act = () =>\n"
+            f"{indent}{{\n"
+            f"{body}"
+            f"{indent}}};\n"
+            f"{indent}act.Should().Throw<{exception_type}>();")
+
+# (name, pattern, replacement) tried in order at the start of each line; the first
+# rule that matches wins and the lines it matched are not looked at again
+_RULES = (
+    # Pattern 1: (() => someCode).Should().Throw<Exception>()
+    # This pattern appears on a single line
+    ('lambda_throw',
+     r'([^\S\n]*)\(\(\) => (.*?)\)\.Should\(\)\.Throw<([^>\n]+)>\(\)(.*?)$',
+     _lambda_throw),
+
+    # Pattern 2: Standalone line that's just a lambda expression without proper statement
+    # e.g., (() => mapper.MapEntityToParameters(null).Should().Throw<ArgumentNullException>());
+    ('inline_lambda_throw',
+     r'([^\S\n]*)\(\(\) => (.*?)\.Should\(\)\.Throw<([^>\n]+)>\(\)\);?$',
+     _action_throw),
+
+    # Pattern 3: Multi-line lambda with opening on current line
+    ('multiline_lambda_throw',
+     # Opening line: (() => ... without the block end on the same line. A lambda that
+     # opens and closes on one line is left alone; the old line loop replaced it with
+     # an empty block
+     r'([^\S\n]*)(?![^\n]*' + _LAMBDA_END + r')[^\n]*\(\(\) =>[^\n]*\n'
+     # Body: every line up to the first block end
+     r'((?:(?![^\n]*' + _LAMBDA_END + r')[^\n]*\n)*)'
+     # Closing line: the block end, carrying the expected exception type
+     r'(?=[^\n]*' + _LAMBDA_END + r')[^\n]*?\.Should\(\)\.Throw<([^>\n]+)>[^\n]*',
+     _multiline_lambda_throw),
+
+    # Pattern 4: Fix incorrect usage like: var config = SqliteConfiguration.FromJsonFileRequired(nonExistentConfig).Should().Throw<FileNotFoundException>();
+    ('var_throw',
+     r'([^\S\n]*)var[^\S\n]+\w+[^\S\n]*=[^\S\n]*(.*?)\.Should\(\)\.Throw<([^>\n]+)>\(\);?$',
+     _action_throw),
+)
+
+# All rules as one alternation, so a line is rewritten by at most one rule
+_RE_EXCEPTION_THROW = re.compile(
+    r'^(?:' + '|'.join(f'(?P<{name}>{pattern})' for name, pattern, repl in _RULES) + r')',
+    re.ASCII | re.MULTILINE)
+
+# Rule name -> (replacement, indexes of the rule's own groups in _RE_EXCEPTION_THROW)
+_DISPATCH = {
+    name: (repl, range(_RE_EXCEPTION_THROW.groupindex[name] + 1,
+                       _RE_EXCEPTION_THROW.groupindex[name] + 1 + re.compile(pattern).groups))
+    for name, pattern, repl in _RULES
+}
+
+def _exception_throw(match):
+    # The rule's named group closes last, so lastgroup is the rule that matched
+    repl, groups = _DISPATCH[match.lastgroup]
+    return repl(*match.group(*groups))
+
+FIXES = (
+    ((), _RE_EXCEPTION_THROW, _exception_throw),
+)
 
 def fix_exception_assertions(content):
-    """Fix exception assertion patterns to use Action/Func pattern"""
-    lines = content.split('\n')
-    fixed_lines = []
-    i = 0
+    r"""Fix exception assertion patterns to use Action/Func pattern, returning (content, number of substitutions)
+
+    A multi-line lambda is rewritten as one block, so assertions nested in its body are left alone:
+
+    >>> content, changes = fix_exception_assertions(
+    ...     '(() => {\n'
+    ...     '    (() => svc.Run(null)).Should().Throw<ArgumentNullException>();\n'
+    ...     '}).Should().Throw<InvalidOperationException>();')
+    >>> print(content)
+    // Act & Assert
+    Action act = () =>
+    {
+        (() => svc.Run(null)).Should().Throw<ArgumentNullException>();
+    };
+    act.Should().Throw<InvalidOperationException>();
+
+    A lambda that opens and closes on the same line is not a multi-line block:
+
+    >>> fix_exception_assertions('x.Invoking(() => { svc.Run(); }).Should().Throw<T>();')
+    ('x.Invoking(() => { svc.Run(); }).Should().Throw<T>();', 0)
+    """
+    if not any(tok in content for tok in TRIGGERS):
+        return content, 0
+    
+    return apply_fixes(FIXES, content)
+
+def process_file(filepath, cached=None):
+    """Process a single file, skipping it if unchanged since the last pass"""
+    content, state = read_source(filepath, TRIGGERS, cached)
+    if content is None:
+        return False, state
     
-    while i < len(lines):
-        line = lines[i]
-        
-        # Pattern 1: (() => someCode).Should().Throw<Exception>()
-        # This pattern appears on a single line
-        match = re.match(r'^(\s*)\(\(\) => (.*?)\)\.Should\(\)\.Throw<([^>]+)>\(\)(.*?)$', line)
-        if match:
-            indent, code, exception_type, rest = match.groups()
-            # Check if the code part already has .Should() in it (malformed)
-            if '.Should()' in code:
-                # Extract the actual code part before .Should()
-                code_parts = code.split('.Should()')
-                if len(code_parts) > 1:
-                    code = code_parts[0]
-            fixed_lines.append(f"{indent}// Act & Assert")
-            fixed_lines.append(f"{indent}Action act = () => {code};")
-            fixed_lines.append(f"{indent}act.Should().Throw<{exception_type}>(){rest}")
-            i += 1
-            continue
-            
-        # Pattern 2: Standalone line that's just a lambda expression without proper statement
-        # e.g., (() => mapper.MapEntityToParameters(null).Should().Throw<ArgumentNullException>());
-        match = re.match(r'^(\s*)\(\(\) => (.*?)\.Should\(\)\.Throw<([^>]+)>\(\)\);?$', line)
-        if match:
-            indent, code, exception_type = match.groups()
-            fixed_lines.append(f"{indent}// Act & Assert")
-            fixed_lines.append(f"{indent}Action act = () => {code};")
-            fixed_lines.append(f"{indent}act.Should().Throw<{exception_type}>();")
-            i += 1
-            continue
-            
-        # Pattern 3: Multi-line lambda with opening on current line
-        if '(() => {' in line or '(() =>' in line:
-            indent_match = re.match(r'^(\s*)', line)
-            indent = indent_match.group(1) if indent_match else ''
-            
-            # Check if this is part of an incorrect throw assertion
-            j = i
-            lambda_lines = []
-            while j < len(lines):
-                lambda_lines.append(lines[j])
-                if '}).Should().Throw' in lines[j] or '});' in lines[j]:
-                    break
-                j += 1
-            
-            if j < len(lines) and '.Should().Throw' in ''.join(lambda_lines):
-                # This is an exception assertion that needs fixing
-                # Extract the lambda body
-                lambda_body = []
-                for k in range(i + 1, j):
-                    lambda_body.append(lines[k])
-                
-                # Extract exception type from the throw assertion
-                throw_match = re.search(r'\.Should\(\)\.Throw<([^>]+)>', lines[j])
-                if throw_match:
-                    exception_type = throw_match.group(1)
-                    fixed_lines.append(f"{indent}// Act & Assert")
-                    fixed_lines.append(f"{indent}Action act = () =>")
-                    fixed_lines.append(f"{indent}{{")
-                    for body_line in lambda_body:
-                        fixed_lines.append(body_line)
-                    fixed_lines.append(f"{indent}}};")
-                    fixed_lines.append(f"{indent}act.Should().Throw<{exception_type}>();")
-                    i = j + 1
-                    continue
-                    
-        # Pattern 4: Fix incorrect usage like: var config = SqliteConfiguration.FromJsonFileRequired(nonExistentConfig).Should().Throw<FileNotFoundException>();
-        match = re.match(r'^(\s*)var\s+\w+\s*=\s*(.*?)\.Should\(\)\.Throw<([^>]+)>\(\);?$', line)
-        if match:
-            indent, code, exception_type = match.groups()
-            fixed_lines.append(f"{indent}// Act & Assert")
-            fixed_lines.append(f"{indent}Action act = () => {code};")
-            fixed_lines.append(f"{indent}act.Should().Throw<{exception_type}>();")
-            i += 1
-            continue
-            
-        fixed_lines.append(line)
-        i += 1
+    content, changes = fix_exception_assertions(content)
     
-    return '\n'.join(fixed_lines)
-
-# Process specific files with exception assertions
-test_dir = '/mnt/e/work/github/crp/persistence-lib/UnitTest'
-
-for root, dirs, files in os.walk(test_dir):
-    for file in files:
-        if file.endswith('.cs'):
-            filepath = os.path.join(root, file)
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            original_content = content
-            content = fix_exception_assertions(content)
-            
-            if content != original_content:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                print(f"Fixed {filepath}")
\ No newline at end of file
+    if changes:
+        state = write_source(filepath, content)
+        print(f"Fixed {filepath}")
+        return True, state
+    return False, state
+
+def main():
+    files = all_cs_files()
+    cache = load_cache((__file__,))
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(process_file, files, [cache.get(f) for f in files]))
+    save_cache((__file__,), {f: state for f, (_, state) in zip(files, results)})
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
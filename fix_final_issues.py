@@ -1,22 +1,48 @@
 #!/usr/bin/env python3
 import re
 import os
+from concurrent.futures import ProcessPoolExecutor
+
+from fix_common import apply_fixes, load_cache, read_source, save_cache, write_source
+
+_RE_LAMBDA_GREATER_THAN = re.compile(r'(\w+) =\.Should\(\)\.BeGreaterThan\(([^)\n]+)\)')
+_RE_INDEX_PREFIX = re.compile(r'\[(\d+)\.')
+
+# Content without any of these substrings cannot match a fix pattern
+TRIGGERS = ('=.Should().BeGreaterThan(', '[')
+
+FIXES = (
+    # Fix pattern: e =.Should().BeGreaterThan(...) -> e => ...
+    ((), _RE_LAMBDA_GREATER_THAN, r'\1 => \2).Should().BeTrue('),
+
+    # Fix pattern: [index. -> [index].
+    # Any identifier can precede it, so there is no literal narrower than '[' to gate on
+    ((), _RE_INDEX_PREFIX, r'[\1].'),
+)
 
 def fix_all_issues(content):
-    """Fix all remaining assertion issues"""
-    lines = content.split('\n')
-    fixed_lines = []
+    """Fix all remaining assertion issues, returning (content, number of substitutions)"""
+    if not any(tok in content for tok in TRIGGERS):
+        return content, 0
     
-    for line in lines:
-        # Fix pattern: e =.Should().BeGreaterThan(...) -> e => ...
-        line = re.sub(r'(\w+) =\.Should\(\)\.BeGreaterThan\(([^)]+)\)', r'\1 => \2).Should().BeTrue(', line)
-        
-        # Fix pattern: [index. -> [index].
-        line = re.sub(r'\[(\d+)\.', r'[\1].', line)
-        
-        fixed_lines.append(line)
+    return apply_fixes(FIXES, content)
+
+def process_file(filepath, cached=None):
+    """Process a single file, skipping it if unchanged since the last pass"""
+    if not os.path.exists(filepath):
+        return False, None
+    
+    content, state = read_source(filepath, TRIGGERS, cached)
+    if content is None:
+        return False, state
     
-    return '\n'.join(fixed_lines)
+    content, changes = fix_all_issues(content)
+    
+    if changes:
+        state = write_source(filepath, content)
+        print(f"Fixed {filepath}")
+        return True, state
+    return False, state
 
 # Process files with known issues
 files_to_fix = [
@@ -29,15 +55,11 @@ files_to_fix = [
     '/mnt/e/work/github/crp/persistence-lib/UnitTest/Providers/SQLitePersistenceProviderAdvancedTests.cs'
 ]
 
-for filepath in files_to_fix:
-    if os.path.exists(filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        content = fix_all_issues(content)
-        
-        if content != original_content:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-            print(f"Fixed {filepath}")
\ No newline at end of file
+def main():
+    cache = load_cache((__file__,))
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(process_file, files_to_fix, [cache.get(f) for f in files_to_fix]))
+    save_cache((__file__,), {f: state for f, (_, state) in zip(files_to_fix, results) if state})
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
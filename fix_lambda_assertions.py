@@ -1,42 +1,50 @@
 #!/usr/bin/env python3
 import re
-import os
+from concurrent.futures import ProcessPoolExecutor
+
+from fix_common import INDEX_NAMES, all_cs_files, apply_fixes, index_fix, load_cache, read_source, save_cache, write_source
+
+_RE_ALL_GREATER_THAN = re.compile(r'\.All\((\w+) =\.Should\(\)\.BeGreaterThan\(([^)\n]+)\)\)')
+
+# Content without any of these substrings cannot match a fix pattern
+TRIGGERS = ('=.Should().BeGreaterThan(', 'results[', 'entities[', 'items[', 'list[', 'entries[')
+
+FIXES = (
+    # Fix pattern: .All(r =.Should().BeGreaterThan(...)) -> .All(r => ...).Should().BeTrue()
+    # Match and fix patterns like: results.All(r =.Should().BeGreaterThan(r.Version == 1))
+    ((), _RE_ALL_GREATER_THAN, r'.All(\1 => \2).Should().BeTrue()'),
+
+    # Fix patterns like: results[0. -> results[0].
+    index_fix(INDEX_NAMES),
+)
 
 def fix_lambda_assertions(content):
-    """Fix lambda expression issues in assertions"""
-    lines = content.split('\n')
-    fixed_lines = []
+    """Fix lambda expression issues in assertions, returning (content, number of substitutions)"""
+    if not any(tok in content for tok in TRIGGERS):
+        return content, 0
     
-    for line in lines:
-        # Fix pattern: .All(r =.Should().BeGreaterThan(...)) -> .All(r => ...).Should().BeTrue()
-        # Match and fix patterns like: results.All(r =.Should().BeGreaterThan(r.Version == 1))
-        line = re.sub(r'\.All\((\w+) =\.Should\(\)\.BeGreaterThan\(([^)]+)\)\)', r'.All(\1 => \2).Should().BeTrue()', line)
-        
-        # Fix patterns like: results[0. -> results[0].
-        line = re.sub(r'results\[(\d+)\.', r'results[\1].', line)
-        line = re.sub(r'entities\[(\d+)\.', r'entities[\1].', line)
-        line = re.sub(r'items\[(\d+)\.', r'items[\1].', line)
-        line = re.sub(r'list\[(\d+)\.', r'list[\1].', line)
-        line = re.sub(r'entries\[(\d+)\.', r'entries[\1].', line)
-        
-        fixed_lines.append(line)
+    return apply_fixes(FIXES, content)
+
+def process_file(filepath, cached=None):
+    """Process a single file, skipping it if unchanged since the last pass"""
+    content, state = read_source(filepath, TRIGGERS, cached)
+    if content is None:
+        return False, state
+    
+    content, changes = fix_lambda_assertions(content)
     
-    return '\n'.join(fixed_lines)
-
-# Process specific files with known issues
-test_dir = '/mnt/e/work/github/crp/persistence-lib/UnitTest'
-
-for root, dirs, files in os.walk(test_dir):
-    for file in files:
-        if file.endswith('.cs'):
-            filepath = os.path.join(root, file)
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            original_content = content
-            content = fix_lambda_assertions(content)
-            
-            if content != original_content:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                print(f"Fixed {filepath}")
\ No newline at end of file
+    if changes:
+        state = write_source(filepath, content)
+        print(f"Fixed {filepath}")
+        return True, state
+    return False, state
+
+def main():
+    files = all_cs_files()
+    cache = load_cache((__file__,))
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(process_file, files, [cache.get(f) for f in files]))
+    save_cache((__file__,), {f: state for f, (_, state) in zip(files, results)})
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
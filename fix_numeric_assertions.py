@@ -1,40 +1,61 @@
 #!/usr/bin/env python3
 import re
-import os
+from concurrent.futures import ProcessPoolExecutor
+
+from fix_common import all_cs_files, apply_fixes, load_cache, read_source, save_cache, write_source
+
+# DateTime comparison method -> numeric comparison method
+_NUMERIC_METHODS = {
+    'BeAfter': 'BeGreaterThan',
+    'BeBefore': 'BeLessThan',
+    'BeOnOrAfter': 'BeGreaterThanOrEqualTo',
+    'BeOnOrBefore': 'BeLessThanOrEqualTo',
+}
+_RE_DATE_METHOD = re.compile(r'\.Should\(\)\.(BeAfter|BeBefore|BeOnOrAfter|BeOnOrBefore)\(')
+
+# Whole lines without DateTime/DateTimeOffset/Time/Date that use any of the DateTime comparison methods
+_RE_DATE_METHOD_LINE = re.compile(r'^(?!.*(?:Time|Date)).*\.Should\(\)\.Be(?:After|Before|OnOrAfter|OnOrBefore)\(.*$', re.MULTILINE)
+
+# Content without any of these substrings cannot match a fix pattern
+TRIGGERS = ('.Should().BeAfter(', '.Should().BeBefore(', '.Should().BeOnOr')
+
+def _fix_numeric_line(match):
+    # Fix numeric comparisons that incorrectly use DateTime methods
+    return _RE_DATE_METHOD.sub(lambda m: f'.Should().{_NUMERIC_METHODS[m.group(1)]}(', match.group(0))
+
+FIXES = (
+    # If the line doesn't contain DateTime/DateTimeOffset/Time/Date in context, 
+    # fix numeric assertions
+    ((), _RE_DATE_METHOD_LINE, _fix_numeric_line),
+)
 
 def fix_numeric_assertions(content):
-    """Fix numeric assertions that incorrectly use DateTime methods"""
-    lines = content.split('\n')
-    fixed_lines = []
+    """Fix numeric assertions that incorrectly use DateTime methods, returning (content, number of substitutions)"""
+    if not any(tok in content for tok in TRIGGERS):
+        return content, 0
+    
+    return apply_fixes(FIXES, content)
+
+def process_file(filepath, cached=None):
+    """Process a single file, skipping it if unchanged since the last pass"""
+    content, state = read_source(filepath, TRIGGERS, cached)
+    if content is None:
+        return False, state
     
-    for line in lines:
-        # If the line doesn't contain DateTime/DateTimeOffset/Time/Date in context, 
-        # fix numeric assertions
-        if not ('DateTime' in line or 'Time' in line or 'Date' in line):
-            # Fix numeric comparisons that incorrectly use DateTime methods
-            line = re.sub(r'\.Should\(\)\.BeAfter\(', r'.Should().BeGreaterThan(', line)
-            line = re.sub(r'\.Should\(\)\.BeBefore\(', r'.Should().BeLessThan(', line)
-            line = re.sub(r'\.Should\(\)\.BeOnOrAfter\(', r'.Should().BeGreaterThanOrEqualTo(', line)
-            line = re.sub(r'\.Should\(\)\.BeOnOrBefore\(', r'.Should().BeLessThanOrEqualTo(', line)
-        
-        fixed_lines.append(line)
+    content, changes = fix_numeric_assertions(content)
     
-    return '\n'.join(fixed_lines)
-
-# Process all test files
-test_dir = '/mnt/e/work/github/crp/persistence-lib/UnitTest'
-
-for root, dirs, files in os.walk(test_dir):
-    for file in files:
-        if file.endswith('.cs'):
-            filepath = os.path.join(root, file)
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            original_content = content
-            content = fix_numeric_assertions(content)
-            
-            if content != original_content:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                print(f"Fixed {filepath}")
\ No newline at end of file
+    if changes:
+        state = write_source(filepath, content)
+        print(f"Fixed {filepath}")
+        return True, state
+    return False, state
+
+def main():
+    files = all_cs_files()
+    cache = load_cache((__file__,))
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(process_file, files, [cache.get(f) for f in files]))
+    save_cache((__file__,), {f: state for f, (_, state) in zip(files, results)})
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,94 +1,84 @@
 #!/usr/bin/env python3
 import re
-import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from fix_common import all_cs_files, apply_fixes, load_cache, read_source, save_cache, write_source
+
+_RE_PAREN_SHOULD_BE = re.compile(r'(\w+)\(\.Should\(\)\.Be(\w+)\(\)\)', re.ASCII | re.MULTILINE)
+_RE_FIRST_BE_BOOL = re.compile(r'\.First\(\.Should\(\)\.(Be(?:True|False))\(\)\.(\w+)\)', re.ASCII | re.MULTILINE)
+_RE_CONTAINS_DOUBLE_QUOTED = re.compile(r'(\w+)\.Contains\("([^"\n]+)"\.Should\(\)\.BeTrue\(\)\)', re.ASCII | re.MULTILINE)
+_RE_CONTAINS_SINGLE_QUOTED = re.compile(r'(\w+)\.Contains\(\'([^\'\n]+)\'\.Should\(\)\.BeTrue\(\)\)', re.ASCII | re.MULTILINE)
+_RE_SQL_CONTAINS = re.compile(r'sql\.Contains\(([^)\n]+)\.Should\(\)\.BeTrue\(\)([^)\n]*)\)', re.ASCII | re.MULTILINE)
+_RE_GREATER_BE_TRUE = re.compile(r'^([^\S\n]*)(.+?)[^\S\n]*>[^\S\n]*(.+?)\.Should\(\)\.BeTrue\(\)(.*)$', re.ASCII | re.MULTILINE)
+_RE_LESS_BE_TRUE = re.compile(r'^([^\S\n]*)(.+?)[^\S\n]*<[^\S\n]*(.+?)\.Should\(\)\.BeTrue\(\)(.*)$', re.ASCII | re.MULTILINE)
+# Only lines containing ' > ' that end with .Should().BeTrue()
+_RE_PREFIXED_GREATER_BE_TRUE = re.compile(r'^(?=.* > )(?=.*\.Should\(\)\.BeTrue\(\)[^\S\n]*$)([^\S\n]*)(.+?)[^\S\n]+(.+?)[^\S\n]*>[^\S\n]*(.+?)\.Should\(\)\.BeTrue\(\)(.*)$', re.ASCII | re.MULTILINE)
+
+# Content without any of these substrings cannot match a fix pattern
+TRIGGERS = ('(.Should().Be', '.Should().BeTrue()')
+
+FIXES = (
+    # Fix pattern: something(.Should().BeTrue())  -> something.Should().BeTrue()
+    # Be\w+ covers BeTrue, BeFalse, BeNull, BeEmpty, ... in a single pass
+    ((), _RE_PAREN_SHOULD_BE, r'\1.Should().Be\2()'),
+
+    # Fix pattern: .First(.Should().BeTrue().property) -> .First().property.Should().BeTrue()
+    # and the same for BeFalse()
+    ((), _RE_FIRST_BE_BOOL, r'.First().\2.Should().\1()'),
+
+    # Fix pattern: something.Contains("text".Should().BeTrue()) -> something.Should().Contain("text")
+    ((), _RE_CONTAINS_DOUBLE_QUOTED, r'\1.Should().Contain("\2")'),
+    ((), _RE_CONTAINS_SINGLE_QUOTED, r"\1.Should().Contain('\2')"),
+
+    # Fix pattern with complex Contains checks
+    ((), _RE_SQL_CONTAINS, r'sql.Should().Contain(\1\2)'),
+
+    # Fix pattern: comparison.Should().BeTrue() where comparison is like "x > y"
+    ((), _RE_GREATER_BE_TRUE, r'\1\2.Should().BeGreaterThan(\3)\4'),
+    ((), _RE_LESS_BE_TRUE, r'\1\2.Should().BeLessThan(\3)\4'),
+
+    # Fix lines ending with Should().BeTrue() where there's an expression before it
+    # that looks like a boolean comparison
+    ((), _RE_PREFIXED_GREATER_BE_TRUE, r'\1\2 \3.Should().BeGreaterThan(\4)\5'),
+)
 
 def fix_assertion_issues(content):
-    """Fix remaining FluentAssertion syntax issues"""
-    lines = content.split('\n')
-    fixed_lines = []
-    
-    for line in lines:
-        original_line = line
-        
-        # Fix pattern: something(.Should().BeTrue())  -> something.Should().BeTrue()
-        line = re.sub(r'(\w+)\(\.Should\(\)\.Be(\w+)\(\)\)', r'\1.Should().Be\2()', line)
-        
-        # Fix pattern: .First(.Should().BeTrue().property) -> .First().property.Should().BeTrue()
-        line = re.sub(r'\.First\(\.Should\(\)\.BeTrue\(\)\.(\w+)\)', r'.First().\1.Should().BeTrue()', line)
-        
-        # Fix pattern: .First(.Should().BeFalse().property) -> .First().property.Should().BeFalse()
-        line = re.sub(r'\.First\(\.Should\(\)\.BeFalse\(\)\.(\w+)\)', r'.First().\1.Should().BeFalse()', line)
-        
-        # Fix pattern: property(.Should().BeTrue()) -> property.Should().BeTrue()
-        line = re.sub(r'(\w+)\(\.Should\(\)\.BeTrue\(\)\)', r'\1.Should().BeTrue()', line)
-        line = re.sub(r'(\w+)\(\.Should\(\)\.BeFalse\(\)\)', r'\1.Should().BeFalse()', line)
-        
-        # Fix pattern: something.Contains("text".Should().BeTrue()) -> something.Should().Contain("text")
-        line = re.sub(r'(\w+)\.Contains\("([^"]+)"\.Should\(\)\.BeTrue\(\)\)', r'\1.Should().Contain("\2")', line)
-        line = re.sub(r'(\w+)\.Contains\(\'([^\']+)\'\.Should\(\)\.BeTrue\(\)\)', r"\1.Should().Contain('\2')", line)
-        
-        # Fix pattern with complex Contains checks
-        line = re.sub(r'sql\.Contains\(([^)]+)\.Should\(\)\.BeTrue\(\)([^)]*)\)', r'sql.Should().Contain(\1\2)', line)
-        
-        # Fix pattern: comparison.Should().BeTrue() where comparison is like "x > y"
-        match = re.match(r'^(\s*)(.+?)\s*>\s*(.+?)\.Should\(\)\.BeTrue\(\)(.*)$', line)
-        if match:
-            indent, left, right, rest = match.groups()
-            line = f"{indent}{left}.Should().BeGreaterThan({right}){rest}"
-        
-        match = re.match(r'^(\s*)(.+?)\s*<\s*(.+?)\.Should\(\)\.BeTrue\(\)(.*)$', line)
-        if match:
-            indent, left, right, rest = match.groups()
-            line = f"{indent}{left}.Should().BeLessThan({right}){rest}"
-            
-        # Fix lines ending with Should().BeTrue() where there's an expression before it
-        # that looks like a boolean comparison
-        if ' > ' in line and line.strip().endswith('.Should().BeTrue()'):
-            # Extract the comparison
-            pattern = r'(\s*)(.+?)\s+(.+?)\s*>\s*(.+?)\.Should\(\)\.BeTrue\(\)(.*)$'
-            match = re.match(pattern, line)
-            if match:
-                indent, prefix, left, right, rest = match.groups()
-                line = f"{indent}{prefix} {left}.Should().BeGreaterThan({right}){rest}"
-        
-        fixed_lines.append(line)
+    """Fix remaining FluentAssertion syntax issues, returning (content, number of substitutions)"""
+    if not any(tok in content for tok in TRIGGERS):
+        return content, 0
     
-    return '\n'.join(fixed_lines)
+    return apply_fixes(FIXES, content)
 
-def process_file(filepath):
-    """Process a single file"""
+def process_file(filepath, cached=None):
+    """Process a single file, skipping it if unchanged since the last pass"""
     print(f"Processing {filepath}...")
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+    content, state = read_source(filepath, TRIGGERS, cached)
+    if content is None:
+        print(f"  No changes needed in {filepath}")
+        return False, state
     
-    original_content = content
-    content = fix_assertion_issues(content)
+    content, changes = fix_assertion_issues(content)
     
-    if content != original_content:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+    if changes:
+        state = write_source(filepath, content)
         print(f"  Fixed assertions in {filepath}")
-        return True
+        return True, state
     else:
         print(f"  No changes needed in {filepath}")
-        return False
+        return False, state
 
 def main():
-    test_dir = '/mnt/e/work/github/crp/persistence-lib/UnitTest'
-    
     # Find all test files
-    test_files = []
-    for root, dirs, files in os.walk(test_dir):
-        for file in files:
-            if file.endswith('Tests.cs'):
-                test_files.append(os.path.join(root, file))
+    test_files = [filepath for filepath in all_cs_files() if filepath.endswith('Tests.cs')]
+    
+    cache = load_cache((__file__,))
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(process_file, test_files, [cache.get(f) for f in test_files]))
+    save_cache((__file__,), {f: state for f, (_, state) in zip(test_files, results)})
     
-    files_modified = 0
-    for filepath in test_files:
-        if process_file(filepath):
-            files_modified += 1
+    files_modified = sum(changed for changed, _ in results)
     
     print(f"\nTotal files modified: {files_modified}")
 
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import re2
+except ImportError:
+    # google-re2 is optional; without it triggers are checked one substring at a time
+    re2 = None
+
+import fix_datetime_assertions
+import fix_exception_assertions
+import fix_lambda_assertions
+import fix_numeric_assertions
+import fix_remaining_assertions
+from fix_common import all_cs_files, apply_fixes, load_cache, read_source, save_cache, write_source
+
+# (trigger substrings, fix table, *Tests.cs only) in the order the fixers must run.
+# Lambda fixes must see BeGreaterThan before the DateTime fixer renames it,
+# and the numeric fixer must run last to undo DateTime methods on numbers
+# The index-prefix fix (fix_common.index_fix) runs once, in the lambda stage
+_PIPELINE = (
+    # fix_remaining_assertions only ever looked at *Tests.cs files
+    (fix_remaining_assertions.TRIGGERS, fix_remaining_assertions.FIXES, True),
+    (fix_exception_assertions.TRIGGERS, fix_exception_assertions.FIXES, False),
+    (fix_lambda_assertions.TRIGGERS, fix_lambda_assertions.FIXES, False),
+    (fix_datetime_assertions.TRIGGERS, fix_datetime_assertions.FIXES, False),
+    (fix_numeric_assertions.TRIGGERS, fix_numeric_assertions.FIXES, False),
+)
+
+# A cached pass of the driver is only valid while none of the fixers change
+_SOURCES = (__file__,) + tuple(module.__file__ for module in (
+    fix_remaining_assertions, fix_exception_assertions, fix_lambda_assertions,
+    fix_datetime_assertions, fix_numeric_assertions))
+
+# Every trigger of every stage; a file with none of them is never decoded
+_TRIGGERS = tuple(tok for triggers, fixes, tests_only in _PIPELINE for tok in triggers)
+
+if re2 is not None:
+    # One RE2 set over every fixer's triggers answers "which fixers can apply" in a single scan
+    _TRIGGER_SET = re2.Set.SearchSet()
+    _TRIGGER_OWNERS = []
+    for index, (triggers, fixes, tests_only) in enumerate(_PIPELINE):
+        for tok in triggers:
+            _TRIGGER_SET.Add(re2.escape(tok))
+            _TRIGGER_OWNERS.append(index)
+    _TRIGGER_SET.Compile()
+
+def _triggered(content):
+    """Return the indexes of pipeline fixers with at least one trigger in content"""
+    if re2 is not None:
+        return {_TRIGGER_OWNERS[i] for i in _TRIGGER_SET.Match(content) or ()}
+    return {index for index, (triggers, fixes, tests_only) in enumerate(_PIPELINE)
+            if any(tok in content for tok in triggers)}
+
+def fix_all_assertions(filepath, content):
+    """Apply every assertion fixer to a file's content in one pass, returning (content, number of substitutions)"""
+    changes = 0
+    triggered = _triggered(content)
+    for index, (triggers, fixes, tests_only) in enumerate(_PIPELINE):
+        if index not in triggered or (tests_only and not filepath.endswith('Tests.cs')):
+            continue
+        content, count = apply_fixes(fixes, content)
+        if count:
+            # A fixer's output can trigger later fixers, so rescan what changed
+            changes += count
+            triggered = _triggered(content)
+    return content, changes
+
+def process_file(filepath, cached=None):
+    """Process a single file, skipping it if unchanged since the last pass"""
+    content, state = read_source(filepath, _TRIGGERS, cached)
+    if content is None:
+        return False, state
+
+    fixed, changes = fix_all_assertions(filepath, content)
+
+    # The DateTime and numeric fixers can undo each other, so confirm a net change
+    if changes and fixed != content:
+        state = write_source(filepath, fixed)
+        print(f"Fixed {filepath}")
+        return True, state
+    return False, state
+
+def main():
+    files = all_cs_files()
+    cache = load_cache(_SOURCES)
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(process_file, files, [cache.get(f) for f in files]))
+    save_cache(_SOURCES, {f: state for f, (_, state) in zip(files, results)})
+
+    files_modified = sum(changed for changed, _ in results)
+
+    print(f"\nTotal files modified: {files_modified}")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file